@@ -1,12 +1,13 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import random
-import sys
-import Levenshtein 
-import pandas as pd
-import time
-import plotly.express as px
-import plotly.graph_objects as go
+import heapq
+import threading
+import orjson
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # --- 0. STREAMLIT PAGE CONFIGURATION ---
 st.set_page_config(layout="wide", page_title="TerraCaughta", page_icon="🌎")
@@ -15,72 +16,132 @@ st.set_page_config(layout="wide", page_title="TerraCaughta", page_icon="🌎")
 REST_COUNTRIES_API_BASE = "https://restcountries.com/v3.1"
 WORLD_BANK_API_BASE = "http://api.worldbank.org/v2/country"
 MAX_MISTAKES = 3
+REQUEST_TIMEOUT = (3, 10) # (connect, read) seconds: fail fast on dead hosts, allow time for the large /all body
+COUNTRY_FIELDS = "name,capital,population,region,currencies,borders,cca2,cca3" # Flag is fetched separately at game end
+# Optional offline copy of /all?fields=COUNTRY_FIELDS; when present, no network is needed for the country list
+COUNTRIES_SNAPSHOT_PATH = Path(__file__).with_name("countries_snapshot.json")
+# About 215 World Bank economies have coordinates; far fewer means a degraded response that must not be cached
+MIN_WORLD_BANK_COUNTRIES = 150
 
 # POINT SYSTEM: Points awarded for solving the puzzle at each clue level (0-indexed)
-POINT_MAP = {0: 10, 1: 8, 2: 6, 3: 4, 4: 2} 
+POINT_TUPLE = (10, 8, 6, 4, 2)
 
 # --- 2. HELPER FUNCTIONS ---
 
+@st.cache_resource # One pooled session per server process, so keep-alive survives reruns
+def get_http_session():
+    """Builds a requests.Session with connection pooling and light retries."""
+    session = requests.Session()
+    session.headers.update({'Accept': 'application/json', 'User-Agent': 'TerraCaughta'})
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=Retry(total=2, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+SESSION = get_http_session()
+
+def points_for(clue_index):
+    """Returns the points for solving at the given clue index (0 outside the clue range)."""
+    return POINT_TUPLE[clue_index] if 0 <= clue_index < len(POINT_TUPLE) else 0
+
 def normalize_text(text):
     """Removes casing and strips whitespace for a more forgiving comparison."""
-    return str(text).lower().strip()
+    return text.lower().strip()
 
-def get_border_names(border_codes):
-    """Translates 3-letter country border codes into full names."""
+def get_border_names(border_codes, countries_by_code):
+    """Translates 3-letter country border codes into the names of the three most populous neighbours."""
     if border_codes == ['Island']:
         return "It is an island country or surrounded by a single nation."
     
-    border_codes_str = ",".join(border_codes)
-    url = f"{REST_COUNTRIES_API_BASE}/alpha?codes={border_codes_str}&fields=name,population"
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        border_data = response.json()
-        border_data_sorted = sorted(border_data, key=lambda x: x.get('population', 0), reverse=True)
-        top_borders = [country['name']['common'] for country in border_data_sorted][:3]
-        return ", ".join(top_borders)
-    except Exception:
+    border_data = [countries_by_code[code] for code in border_codes if code in countries_by_code]
+    if not border_data:
         return "Border data unavailable."
+    top_borders = heapq.nlargest(3, border_data, key=lambda x: x.get('population', 0))
+    return ", ".join(country['name']['common'] for country in top_borders)
 
-def get_world_bank_clue(country_iso_code):
+def get_world_bank_index():
     """
-    Fetches coordinates and Income Level, and formats them for the desired structured output.
-    Returns a dictionary containing formatted strings and raw lat/lon values.
+    Returns the World Bank clue for every country with usable coordinates, keyed by ISO2 code.
+    Returns an empty dict if the World Bank API is unavailable.
+    """
+    try:
+        return _load_world_bank_index()
+    except (requests.exceptions.RequestException, ValueError, IndexError, TypeError, KeyError): # ValueError covers orjson.JSONDecodeError
+        return {}
+
+@st.cache_data(ttl=86400, show_spinner=False) # One bulk call covers every country; in memory for a day, errors not cached
+def _load_world_bank_index():
+    """Fetches all World Bank country records in a single request and formats a clue for each valid one."""
+    url = f"{WORLD_BANK_API_BASE}?format=json&per_page=400"
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    
+    payload = orjson.loads(response.content)
+    # Errors come back as HTTP 200 with a one-element [{"message": ...}] body, so check the shape before reading page 2
+    if not isinstance(payload, list) or len(payload) < 2 or not isinstance(payload[1], list):
+        raise ValueError(f"Unexpected World Bank response: {payload!r:.200}")
+    
+    world_bank_index = {}
+    for record in payload[1]:
+        clue = format_world_bank_clue(record)
+        if clue is not None:
+            world_bank_index[record['iso2Code']] = clue
+    if len(world_bank_index) < MIN_WORLD_BANK_COUNTRIES:
+        raise ValueError(f"World Bank response had only {len(world_bank_index)} countries with coordinates")
+    return world_bank_index
+
+def format_world_bank_clue(data):
+    """
+    Formats coordinates and Income Level of one World Bank country record for the desired structured output.
+    Returns a dictionary containing formatted strings and raw lat/lon values, or None if coordinates are missing.
     """
-    url = f"{WORLD_BANK_API_BASE}/{country_iso_code}?format=json&per_page=1"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()[1][0]
-        
         # Parse data
         lat = float(data['latitude'])
         lon = float(data['longitude'])
         income_level = data['incomeLevel']['value']
-        
-        if not lat or not lon:
-             return {'location': 'Unavailable', 'classification': 'Unavailable', 'lat': None, 'lon': None}
+    except (ValueError, KeyError, TypeError):
+        # Aggregates (regions, income groups) and incomplete records have no usable coordinates
+        return None
+    
+    if not lat or not lon:
+        return None
 
-        # Determine directions (N/S, E/W)
-        lat_dir = 'N' if lat >= 0 else 'S'
-        lon_dir = 'E' if lon >= 0 else 'W'
-        
-        abs_lat = round(abs(lat), 2)
-        abs_lon = round(abs(lon), 2)
-        
-        # Create the two separate components for structured display
-        location_string = f"**{abs_lat}°** {lat_dir}, **{abs_lon}°** {lon_dir}"
-        classification_string = f"**{income_level}**"
-        
-        return {
-            'location': location_string,
-            'classification': classification_string,
-            'lat': lat,
-            'lon': lon
-        }
+    # Determine directions (N/S, E/W)
+    lat_dir = 'N' if lat >= 0 else 'S'
+    lon_dir = 'E' if lon >= 0 else 'W'
+    
+    abs_lat = round(abs(lat), 2)
+    abs_lon = round(abs(lon), 2)
+    
+    # Create the two separate components for structured display
+    location_string = f"**{abs_lat}°** {lat_dir}, **{abs_lon}°** {lon_dir}"
+    classification_string = f"**{income_level}**"
+    
+    return {
+        'location': location_string,
+        'classification': classification_string,
+        'lat': lat,
+        'lon': lon
+    }
+
+def get_flag_png(country_iso_code):
+    """Returns the URL of the country's PNG flag, or None if it can't be fetched."""
+    try:
+        return _fetch_flag_png(country_iso_code)
     except Exception:
-        return {'location': 'Unavailable', 'classification': 'Unavailable', 'lat': None, 'lon': None}
+        return None
+
+@st.cache_data(ttl=604800, show_spinner=False) # Flags are static; only needed on the end-game screen
+def _fetch_flag_png(country_iso_code):
+    """Cached single-country flag lookup behind get_flag_png."""
+    url = f"{REST_COUNTRIES_API_BASE}/alpha/{country_iso_code}?fields=flags"
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    if isinstance(data, list): # /alpha may wrap a single result in a list
+        data = data[0]
+    return data['flags']['png']
 
 # --- PLOTLY IMPLEMENTATION FOR ZOOMABLE, UNLABELED MAP ---
 def plot_coordinate_clue(lat, lon):
@@ -88,28 +149,19 @@ def plot_coordinate_clue(lat, lon):
     if lat is None or lon is None:
         st.warning("Map Clue: Cannot plot due to missing coordinates.")
         return
-    
-    # Create a DataFrame for Plotly
-    map_data = pd.DataFrame({'lat': [lat], 'lon': [lon]})
-    
-    # 1. Create the base figure
-    fig = go.Figure(data=go.Scattergeo(
-        locationmode = 'ISO-3',
-        lon = map_data['lon'],
-        lat = map_data['lat'],
-        mode = 'markers',
-        marker = dict(
-            size = 12,           # Marker size (small dot)
-            color = 'red',       # Marker color
-            line_width = 1,
-            symbol='circle',
-        )
-    ))
-    
-    # 2. Configure the layout for an unlabeled, zoomable map
-    fig.update_layout(
+
+    # Rounded to the precision shown in the location clue, so the cache key is stable
+    lat, lon = round(lat, 2), round(lon, 2)
+    # A per-coordinate key keeps the same chart component mounted across reruns of a round
+    st.plotly_chart(_build_map_figure(lat, lon), use_container_width=True, key=f"map_{lat},{lon}")
+
+@st.cache_resource # The layout is identical for every round; build it once per server process
+def get_map_layout():
+    """Returns the shared layout settings for an unlabeled, zoomable dark world map."""
+    return dict(
         geo = dict(
             scope='world',
+            resolution=110,                   # Coarse 1:110m Natural Earth outlines; plenty for a single marker
             landcolor='rgb(30, 30, 30)',      # Dark land color
             coastlinecolor='rgb(100, 100, 100)', # Dark coastline
             showland = True,
@@ -124,6 +176,29 @@ def plot_coordinate_clue(lat, lon):
         height=400,
         template='plotly_dark' 
     )
+
+@st.cache_resource(max_entries=256) # Room for one figure per playable country; reused across reruns and sessions
+def _build_map_figure(lat, lon):
+    """Builds the dark, unlabeled Plotly world map with a single marker at (lat, lon)."""
+    # Imported lazily: only the map needs it, so the name screen renders without paying for it
+    import plotly.graph_objects as go
+
+    # 1. Create the base figure
+    fig = go.Figure(data=go.Scattergeo(
+        locationmode = 'ISO-3',
+        lon = [lon],
+        lat = [lat],
+        mode = 'markers',
+        marker = dict(
+            size = 12,           # Marker size (small dot)
+            color = 'red',       # Marker color
+            line_width = 1,
+            symbol='circle',
+        )
+    ))
+    
+    # 2. Configure the layout for an unlabeled, zoomable map
+    fig.update_layout(**get_map_layout())
     
     # Set the initial view to zoom in slightly on the marker's location
     fig.update_geos(
@@ -133,93 +208,173 @@ def plot_coordinate_clue(lat, lon):
         projection_scale=1.5 
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 # --- Robust Data Fetching with Coordinate Check and Uniqueness Check ---
-@st.cache_data(ttl=3600) # Cache the full country list for 1 hour to reduce API calls
-def fetch_all_countries():
-    """Fetches and filters the full list of countries once."""
-    fields = "name,capital,flags,population,region,currencies,borders,cca2,latlng"
-    full_url = f"{REST_COUNTRIES_API_BASE}/all?fields={fields}"
-    try:
-        response = requests.get(full_url)
+@st.cache_data(ttl=86400, show_spinner=False) # In memory for a day (one bounded entry); the snapshot covers cold starts; failures raise and are not cached
+def _load_all_countries():
+    """
+    Loads the full country list (bundled snapshot first, API otherwise).
+    Returns (records for countries above the population threshold, normalized name -> display name for every country).
+    """
+    if COUNTRIES_SNAPSHOT_PATH.exists():
+        all_countries_data = orjson.loads(COUNTRIES_SNAPSHOT_PATH.read_bytes())
+    else:
+        full_url = f"{REST_COUNTRIES_API_BASE}/all?fields={COUNTRY_FIELDS}"
+        response = SESSION.get(full_url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
-        all_countries_data = response.json()
-        
-        # Filter: Population >= 1,000,000
-        filtered_countries = [
-            country for country in all_countries_data 
-            if country.get('population', 0) >= 500000
-        ]
-        return filtered_countries
-    except requests.exceptions.RequestException as e:
+        all_countries_data = orjson.loads(response.content)
+    
+    # Checked for both sources: an API error body or a snapshot taken with an older field list
+    # would otherwise fail deep in record building, or silently blank the neighbour clues
+    if not isinstance(all_countries_data, list) or not all(map(has_required_fields, all_countries_data)):
+        raise ValueError(f"Country data is missing required fields; expected a list from /all?fields={COUNTRY_FIELDS}")
+    
+    # Neighbours are resolved locally against the full list (not just the filtered one),
+    # so small bordering countries still get a name without another API call
+    countries_by_code = {country['cca3']: country for country in all_countries_data}
+    # Names come from the full list too, so a small country (e.g. Iceland) is still rejected as a wrong guess
+    country_name_index = {normalize_text(country['name']['common']): country['name']['common'] for country in all_countries_data}
+    
+    # Filter: Population >= 500,000
+    filtered_countries = [
+        to_country_record(country, countries_by_code) for country in all_countries_data 
+        if country.get('population', 0) >= 500000
+    ]
+    if not filtered_countries:
+        raise ValueError("Country data contained no countries above the population threshold")
+    return filtered_countries, country_name_index
+
+def has_required_fields(country):
+    """Returns True if a REST Countries entry has the fields the loader reads without a default (name.common, cca2, cca3)."""
+    return (
+        isinstance(country, dict) and 'cca2' in country and 'cca3' in country
+        and isinstance(country.get('name'), dict) and 'common' in country['name']
+    )
+
+def to_country_record(country, countries_by_code):
+    """Flattens one REST Countries entry into the fields the game reads, with defaults for missing data."""
+    return {
+        'name': country['name']['common'],
+        'population': country.get('population', 0),
+        'currency': next(iter(country.get('currencies') or {'ABC': None})),
+        'capital': (country.get('capital') or ['Unknown'])[0],
+        'border_names': get_border_names(country.get('borders') or ['Island'], countries_by_code),
+        'cca2': country.get('cca2', 'XX'),
+    }
+
+def fetch_all_countries():
+    """Returns the cached, filtered list of countries (empty list on API failure)."""
+    try:
+        return _load_all_countries()[0]
+    except (requests.exceptions.RequestException, ValueError) as e: # ValueError covers orjson.JSONDecodeError
         st.error(f"FATAL API ERROR: Could not fetch country data: {e}")
         return []
 
-def select_mystery_country(filtered_countries):
-    """Selects a unique country with valid World Bank coordinates."""
+def get_country_name_index():
+    """Maps every country's normalized name to its display name, for O(1) exact-guess checks (empty dict on API failure)."""
+    try:
+        return _load_all_countries()[1]
+    except (requests.exceptions.RequestException, ValueError):
+        return {}
+
+def select_mystery_country(filtered_countries, world_bank_index):
+    """Selects a unique country with valid World Bank coordinates.
+
+    Returns (country, world_bank_clue), or (None, None) if no country is available.
+    """
     
     if not filtered_countries:
-        return None
+        return None, None
     
-    MAX_RETRIES = 100
-    for i in range(MAX_RETRIES):
-        
-        # Check if all possible countries have been used in this session
-        if len(st.session_state.used_countries) >= len(filtered_countries):
-            st.warning("You have guessed all available countries! Resetting list.")
-            st.session_state.used_countries = set()
-            # Loop will continue with fresh list
-        
-        mystery_country = random.choice(filtered_countries)
-        country_name = mystery_country['name']['common']
-        
-        # Check 1: Is this country already used in the session?
-        if country_name in st.session_state.used_countries:
-            continue
-        
-        # 2. Get ISO Code (needed for World Bank API)
-        country_iso_code = mystery_country.get('cca2', 'XX')
-        
-        # 3. Check World Bank Data
-        world_bank_clue = get_world_bank_clue(country_iso_code)
-        
-        # Check 2: Does this country have valid coordinates?
-        if world_bank_clue['lat'] is not None and world_bank_clue['lon'] is not None:
-            # Success! Found a valid, unused country.
-            if 'borders' not in mystery_country or len(mystery_country['borders']) == 0:
-                mystery_country['borders'] = ['Island'] 
-            
-            st.session_state._wb_clue = world_bank_clue 
-            return mystery_country
-        
-        # If coordinates were None, the loop continues to the next retry
+    # Check 1: Does this country have valid coordinates? (bulk index lookup, no per-country calls)
+    playable_countries = [c for c in filtered_countries if c['cca2'] in world_bank_index]
+    
+    # Check 2: Only consider countries not already used in this session
+    candidates = [c for c in playable_countries if c['cca2'] not in st.session_state.used_countries]
+    if not candidates and playable_countries:
+        st.warning("You have guessed all available countries! Resetting list.")
+        st.session_state.used_countries = set()
+        candidates = playable_countries
+    
+    if not candidates:
+        st.error("Error: Failed to find a new country with valid coordinates.")
+        return None, None
+    
+    # Success! Pick a valid, unused country.
+    mystery_country = random.choice(candidates)
+    
+    return mystery_country, world_bank_index[mystery_country['cca2']]
+
 
-    st.error("Error: Failed to find a new, valid country after 100 attempts.")
-    return None
+@st.cache_data(max_entries=256, show_spinner=False) # Keyed on the data itself, so refreshed country or World Bank data never reuses stale text
+def build_clue_list(country, world_bank_data):
+    """
+    Formats the five clue strings for a country, from hardest to easiest.
+    Both small dicts are hashed into the cache key, so the text always matches the data the map uses.
+    """
+    # --- DIFFICULTY SEQUENCE (The Funnel) ---
+    return [
+        f"Clue 1 (10 Points Potential): Approximate Location (Textual):\n"
+        f"1) Location: {world_bank_data['location']}\n"
+        f"2) Economic Classification: {world_bank_data['classification']}", 
+        
+        f"Clue 2 (8 Points Potential): Population: **{country['population']:,}**.",
+        f"Clue 3 (6 Points Potential): Currency Code: **{country['currency']}**.",
+        f"Clue 4 (4 Points Points Potential): Neighbors: **{country['border_names']}**.", 
+        f"Clue 5 (2 Points Potential): Capital City: **{country['capital']}**.",
+    ]
+
+
+@st.cache_resource # Runs once per server process; later sessions find the caches already warm
+def start_cache_warmup():
+    """Prefetches the country list and World Bank index on background threads, one per download."""
+    def warm_cache(loader):
+        try:
+            loader()
+        except Exception:
+            pass # initialize_game reports the failure if it persists when the game starts
+    
+    warmup_threads = [
+        threading.Thread(target=warm_cache, args=(loader,), daemon=True)
+        for loader in (_load_all_countries, _load_world_bank_index)
+    ]
+    for warmup_thread in warmup_threads:
+        warmup_thread.start()
+    return warmup_threads
 
 
 # --- 3. STREAMLIT APP LOGIC ---
 
+# Warm the data caches while the player is still on the name screen
+start_cache_warmup()
+
 # Initialize Session State
-if 'game_started' not in st.session_state: st.session_state.game_started = False
-if 'mystery_country' not in st.session_state: st.session_state.mystery_country = None
-if 'clue_index' not in st.session_state: st.session_state.clue_index = 0
-if 'clues_list' not in st.session_state: st.session_state.clues_list = []
-if 'game_ended' not in st.session_state: st.session_state.game_ended = False
-if 'guess_input' not in st.session_state: st.session_state.guess_input = ""
-if 'win' not in st.session_state: st.session_state.win = False
-if 'current_streak' not in st.session_state: st.session_state.current_streak = 0
-if 'accumulated_points' not in st.session_state: st.session_state.accumulated_points = 0
-if 'user_name' not in st.session_state: st.session_state.user_name = None
-if 'exit_message' not in st.session_state: st.session_state.exit_message = None
-if '_wb_clue' not in st.session_state: st.session_state._wb_clue = None # Temporary storage
-if 'last_streak' not in st.session_state: st.session_state.last_streak = 0 # Stores streak before loss
-if 'used_countries' not in st.session_state: st.session_state.used_countries = set() # Track used countries
-
-
-ALTERNATE_NAMES = {
+SESSION_DEFAULTS = {
+    'game_started': False,
+    'mystery_country': None,
+    'clue_index': 0,
+    'clues_list': [],
+    'game_ended': False,
+    'guess_input': "",
+    'win': False,
+    'current_streak': 0,
+    'accumulated_points': 0,
+    'user_name': None,
+    'exit_message': None,
+    'last_streak': 0, # Stores streak before loss
+    'used_countries': set(), # Track used countries (ISO2 codes)
+    'known_country_names': {}, # Normalized name -> display name for every country, captured once per game
+}
+# Fresh objects each script run, so mutable defaults are never shared between sessions
+for key, default in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, default)
+
+
+# Keys and aliases are passed through normalize_text once at import, so they compare directly
+# against normalized guesses; values are frozensets so exact alias checks are O(1) hash lookups
+ALTERNATE_NAMES = {normalize_text(name): frozenset(map(normalize_text, aliases)) for name, aliases in {
     'netherlands': ['holland', 'the netherlands'], 
     'united kingdom': ['uk', 'britain', 'england'],
     'united states': ['usa', 'us', 'america'], 
@@ -233,7 +388,10 @@ ALTERNATE_NAMES = {
     'iran': ['persia'], 
     'türkiye': ['turkey'], 
     'czechia': ['czech republic']
-}
+}.items()}
+
+# Inverse lookup: each canonical name and alias maps to its canonical name
+ALIAS_TO_CANONICAL = {alias: name for name, aliases in ALTERNATE_NAMES.items() for alias in (name, *aliases)}
 
 # --- HANDLER FOR NAME SUBMISSION ---
 def handle_name_submit():
@@ -246,8 +404,12 @@ def initialize_game():
     """Fetches new data and resets session state for a new game."""
     st.session_state.exit_message = None 
     
-    # 1. Fetch country list (cached) and select a mystery country
-    filtered_countries = fetch_all_countries()
+    # 1. Fetch country list and World Bank index (both cached) concurrently, then select a mystery country.
+    # The country list stays on this thread because fetch_all_countries reports errors through st.error.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        world_bank_future = executor.submit(get_world_bank_index)
+        filtered_countries = fetch_all_countries()
+        world_bank_index = world_bank_future.result()
     if not filtered_countries:
         # Stop game if we can't get data (this handles FATAL API ERROR early)
         st.session_state.mystery_country = None
@@ -255,31 +417,15 @@ def initialize_game():
         return
 
     with st.spinner('Fetching a unique mystery country...'):
-        country = select_mystery_country(filtered_countries)
+        country, world_bank_data = select_mystery_country(filtered_countries, world_bank_index)
         st.session_state.mystery_country = country
 
     if country:
-        # --- Use pre-fetched World Bank data ---
-        world_bank_data = st.session_state._wb_clue
-        # --------------------------------------------------
-        
         # Prepare Clues
-        iso = country.get('cca2', 'XX')
-        border_names = get_border_names(country.get('borders', []))
-        currency = list(country.get('currencies', {'ABC':{}}).keys())[0]
-        
-        # --- DIFFICULTY SEQUENCE (The Funnel) ---
-        st.session_state.clues_list = [
-            f"Clue 1 (10 Points Potential): Approximate Location (Textual):\n"
-            f"1) Location: {world_bank_data['location']}\n"
-            f"2) Economic Classification: {world_bank_data['classification']}", 
-            
-            f"Clue 2 (8 Points Potential): Population: **{country['population']:,}**.",
-            f"Clue 3 (6 Points Potential): Currency Code: **{currency}**.",
-            f"Clue 4 (4 Points Points Potential): Neighbors: **{border_names}**.", 
-            f"Clue 5 (2 Points Potential): Capital City: **{country.get('capital', ['Unknown'])[0]}**.",
-        ]
+        st.session_state.clues_list = build_clue_list(country, world_bank_data)
         
+        st.session_state.normalized_name = normalize_text(country['name']) # Reused by every guess this round
+        st.session_state.known_country_names = get_country_name_index() # Read once here, so guesses never touch the cache or network
         st.session_state.lat = world_bank_data['lat']
         st.session_state.lon = world_bank_data['lon']
         st.session_state.game_started = True
@@ -319,12 +465,15 @@ def handle_next_clue():
         st.session_state.win = False
         st.session_state.last_streak = st.session_state.current_streak # CAPTURE STREAK
         st.session_state.current_streak = 0 # STREAK RESET on loss/skip
-        st.session_state.used_countries.add(st.session_state.mystery_country['name']['common']) # ADD COUNTRY TO USED LIST
+        st.session_state.used_countries.add(st.session_state.mystery_country['cca2']) # ADD COUNTRY TO USED LIST
         st.toast("Time's up! Game over (Skipped final clue).")
 
 
 def handle_submit_guess():
     """Handles guess submission, updates points, and manages streak/game state."""
+    # Imported lazily: only guessing needs rapidfuzz, so the name screen renders without paying for it
+    from rapidfuzz.distance import Levenshtein
+    
     user_guess = normalize_text(st.session_state.guess_input)
     
     if not user_guess:
@@ -332,40 +481,98 @@ def handle_submit_guess():
         return
 
     # 1. Match Logic
-    country_name = st.session_state.mystery_country['name']['common']
-    normalized_name = normalize_text(country_name)
+    country_iso_code = st.session_state.mystery_country['cca2']
+    normalized_name = st.session_state.normalized_name
+    
+    known_country_names = st.session_state.known_country_names
     
     is_match = False
-    if user_guess == normalized_name: is_match = True
-    elif normalized_name in ALTERNATE_NAMES and user_guess in ALTERNATE_NAMES[normalized_name]: is_match = True
-    elif len(user_guess) > 3 and Levenshtein.distance(user_guess, normalized_name) <= MAX_MISTAKES: is_match = True
+    # Exact name, or an alias resolved in a single dict lookup
+    if user_guess == normalized_name or ALIAS_TO_CANONICAL.get(user_guess) == normalized_name: is_match = True
+    # Exactly another country's name (e.g. "niger" for Nigeria): wrong, with no edit-distance work
+    elif user_guess in known_country_names: is_match = False
+    # A truncated name is exactly len-difference deletions away, so it matches without any DP
+    elif (len(user_guess) > 3 and normalized_name.startswith(user_guess)
+          and len(normalized_name) - len(user_guess) <= MAX_MISTAKES): is_match = True
+    elif len(user_guess) > 3:
+        # Typos are only forgiven against the canonical name; aliases such as "uk" or "usa" are too short
+        # to allow MAX_MISTAKES edits. score_cutoff lets rapidfuzz stop early once the distance is exceeded.
+        is_match = Levenshtein.distance(user_guess, normalized_name, score_cutoff=MAX_MISTAKES) <= MAX_MISTAKES
     
     # 2. Handle Result
     if is_match:
         # Calculate and accumulate points
-        points_awarded = POINT_MAP.get(st.session_state.clue_index, 0)
+        points_awarded = points_for(st.session_state.clue_index)
         st.session_state.accumulated_points += points_awarded
         
         st.session_state.game_ended = True
         st.session_state.win = True
         st.session_state.current_streak += 1 # STREAK INCREMENT on win
-        st.session_state.used_countries.add(country_name) # ADD COUNTRY TO USED LIST
+        st.session_state.used_countries.add(country_iso_code) # ADD COUNTRY TO USED LIST
     else:
         # Wrong guess moves to next clue
         if st.session_state.clue_index < len(st.session_state.clues_list) - 1:
             st.session_state.clue_index += 1
-            st.toast(f"'{user_guess}' was incorrect. Next clue revealed!")
+            if user_guess in known_country_names:
+                st.toast(f"It's not {known_country_names[user_guess]}. Next clue revealed!")
+            else:
+                st.toast(f"'{user_guess}' was incorrect. Next clue revealed!")
         else:
             # Wrong guess on last clue ends game
             st.session_state.game_ended = True 
             st.session_state.win = False
             st.session_state.last_streak = st.session_state.current_streak # CAPTURE STREAK
             st.session_state.current_streak = 0 # STREAK RESET on loss
-            st.session_state.used_countries.add(country_name) # ADD COUNTRY TO USED LIST
+            st.session_state.used_countries.add(country_iso_code) # ADD COUNTRY TO USED LIST
 
     st.session_state.guess_input = ""
 
 
+@st.fragment # Guesses and clue advances rerun only this panel, not the header and map
+def clues_panel_fragment():
+    """Renders the revealed clues and the guess/advance controls for the current round."""
+    # A guess that ends the round needs the end-game screen: escalate to a full-app rerun
+    if st.session_state.game_ended:
+        st.rerun()
+    
+    # Clues Section
+    st.subheader(f"Clues Revealed ({st.session_state.clue_index + 1} of 5)")
+
+    with st.container(border=True):
+        # One markdown element for all revealed clues: a single delta per rerun instead of one per clue
+        revealed_clues = st.session_state.clues_list[:st.session_state.clue_index + 1]
+        st.markdown("\n\n".join(f"**{clue}**" for clue in revealed_clues))
+
+    # Input Section
+    st.markdown("**---**")
+    st.markdown("#### Guess or Advance")
+
+    st.text_input(
+        "Enter your Country Guess:",
+        key="guess_input",
+        placeholder="Type country name...",
+        on_change=handle_submit_guess
+    )
+
+    # Determine button labels
+    guess_label = "Submit Guess"
+    next_clue_label = "Next Clue"
+
+    if st.session_state.clue_index == len(st.session_state.clues_list) - 2: 
+        next_clue_label = "Last Clue"
+    elif st.session_state.clue_index == len(st.session_state.clues_list) - 1: 
+        next_clue_label = "End Game"
+
+    # Use columns to place buttons side-by-side
+    col_submit, col_next = st.columns([1, 1])
+
+    with col_submit:
+        st.button(guess_label, on_click=handle_submit_guess, type="primary") 
+
+    with col_next:
+        st.button(next_clue_label, on_click=handle_next_clue, type="secondary")
+
+
 # --- 4. UI RENDERER (Optimized) ---
 st.title("🌎 TerraCaughta")
 st.markdown("A daily geography challenge built for the web. Use clues to find the hidden country!")
@@ -416,42 +623,7 @@ if st.session_state.game_started and not st.session_state.game_ended:
     
     # --- RIGHT COLUMN: CLUES & INPUT ---
     with col_clues:
-        
-        # Clues Section
-        st.subheader(f"Clues Revealed ({st.session_state.clue_index + 1} of 5)")
-        
-        with st.container(border=True):
-            for clue in st.session_state.clues_list[:st.session_state.clue_index + 1]:
-                st.markdown(f"**{clue}**")
-
-        # Input Section
-        st.markdown("**---**")
-        st.markdown("#### Guess or Advance")
-        
-        st.text_input(
-            "Enter your Country Guess:",
-            key="guess_input",
-            placeholder="Type country name...",
-            on_change=handle_submit_guess
-        )
-        
-        # Determine button labels
-        guess_label = "Submit Guess"
-        next_clue_label = "Next Clue"
-        
-        if st.session_state.clue_index == len(st.session_state.clues_list) - 2: 
-            next_clue_label = "Last Clue"
-        elif st.session_state.clue_index == len(st.session_state.clues_list) - 1: 
-            next_clue_label = "End Game"
-        
-        # Use columns to place buttons side-by-side
-        col_submit, col_next = st.columns([1, 1])
-        
-        with col_submit:
-            st.button(guess_label, on_click=handle_submit_guess, type="primary") 
-            
-        with col_next:
-            st.button(next_clue_label, on_click=handle_next_clue, type="secondary")
+        clues_panel_fragment()
 
 
 # --- END GAME SCREEN UI ---
@@ -468,7 +640,7 @@ if st.session_state.game_ended:
 
     with col_msg:
         # Personalized Win/Loss Message
-        points_gained_this_round = POINT_MAP.get(st.session_state.clue_index, 0)
+        points_gained_this_round = points_for(st.session_state.clue_index)
         
         if st.session_state.get('win', False):
             # Win Message 
@@ -481,9 +653,9 @@ if st.session_state.game_ended:
         else:
             # Loss Message 
             if display_streak > 0:
-                 st.error(f"💀 Your streak ended at **{display_streak}**! Oops, {name}, you didn't get it this time. The country was **{country['name']['common']}**.")
+                 st.error(f"💀 Your streak ended at **{display_streak}**! Oops, {name}, you didn't get it this time. The country was **{country['name']}**.")
             else:
-                st.error(f"💀 Oops, {name}, you didn't get it this time. The country was **{country['name']['common']}**.")
+                st.error(f"💀 Oops, {name}, you didn't get it this time. The country was **{country['name']}**.")
             
         st.markdown("---")
         
@@ -495,11 +667,14 @@ if st.session_state.game_ended:
         st.subheader("Final Clue Review:")
         
         with st.container(border=True):
-            for clue in st.session_state.clues_list:
-                st.markdown(f"- {clue}") 
+            st.markdown("\n".join(f"- {clue}" for clue in st.session_state.clues_list))
         
     with col_flag:
-        st.image(country['flags']['png'], caption=f"Flag of {country['name']['common']}")
+        flag_url = get_flag_png(country['cca2'])
+        if flag_url:
+            st.image(flag_url, caption=f"Flag of {country['name']}")
+        else:
+            st.caption(f"Flag of {country['name']} unavailable.")
         
         # Button Section
         col_play, col_exit = st.columns([1, 1])